@@ -1,5 +1,4 @@
 import os
-import json
 import logging
 import sys
 from spotify_utils import (
@@ -7,19 +6,23 @@ from spotify_utils import (
     get_playlist_tracks, 
     test_spotify_connection,
     SpotifyQuotaExceeded,
-    SpotifyConnectionError
+    SpotifyConnectionError,
+    METADATA_FILE
 )
-from youtube_utils import load_metadata, download_song, get_download_stats
+from youtube_utils import (
+    configure_logging,
+    load_metadata,
+    download_tracks,
+    get_download_stats,
+    get_pending_tracks,
+    DownloadArchive,
+    print_download_stats
+)
+
+__all__ = ["check_requirements", "fetch_spotify_metadata", "download_mp3s", "main"]
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("download_log.txt"),
-        logging.StreamHandler()
-    ]
-)
+configure_logging()
 
 def check_requirements() -> bool:
     """Check if all required files and dependencies are present"""
@@ -87,13 +90,7 @@ def fetch_spotify_metadata() -> bool:
             logging.warning("⚠️ No tracks found in the playlist.")
             return False
 
-        # Step 4: Save to metadata folder
-        os.makedirs("metadata", exist_ok=True)
-        output_file = "metadata/spotify_playlist_metadata.json"
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(tracks, f, indent=2, ensure_ascii=False)
-
-        # Step 5: Show statistics
+        # Step 4: Show statistics (tracks were already streamed to METADATA_FILE)
         youtube_urls_count = sum(1 for track in tracks if track.get('youtube_url'))
         
         print(f"\n✅ Successfully fetched metadata!")
@@ -101,9 +98,9 @@ def fetch_spotify_metadata() -> bool:
         print(f"   📝 Total tracks: {len(tracks)}")
         print(f"   🎯 YouTube URLs found: {youtube_urls_count}")
         print(f"   🔍 Will use search for: {len(tracks) - youtube_urls_count}")
-        print(f"   💾 Saved to: {output_file}")
+        print(f"   💾 Saved to: {METADATA_FILE}")
 
-        logging.info(f"✅ Saved metadata for {len(tracks)} tracks to {output_file}")
+        logging.info(f"✅ Saved metadata for {len(tracks)} tracks to {METADATA_FILE}")
         return True
 
     except SpotifyQuotaExceeded as e:
@@ -145,14 +142,10 @@ def download_mp3s() -> bool:
         print("💡 Run the metadata fetcher first!")
         return False
 
-    # Show initial statistics
-    stats = get_download_stats(tracks)
-    print(f"\n📊 Current Status:")
-    print(f"   📝 Total tracks: {stats['total']}")
-    print(f"   ✅ Already downloaded: {stats['downloaded']}")
-    print(f"   ⏳ Remaining: {stats['remaining']}")
-    print(f"   🎯 Have YouTube URLs: {stats['has_youtube_url']}")
-    print(f"   📈 Current success rate: {stats['success_rate']:.1f}%")
+    # Show initial statistics from the download archive
+    archive = DownloadArchive()
+    stats = get_download_stats(tracks, archive.downloaded, archive.failed)
+    print_download_stats(stats)
 
     if stats['remaining'] == 0:
         print("\n🎉 All tracks already downloaded!")
@@ -164,34 +157,14 @@ def download_mp3s() -> bool:
         print("⏹️  Download cancelled by user")
         return False
 
+    if stats['downloaded']:
+        logging.info(f"⏭️  Already exists: skipping {stats['downloaded']} downloaded tracks")
     print(f"\n🎵 Starting downloads...\n")
 
-    # Download tracks
-    success_count = 0
-    fail_count = 0
-    
-    for i, track in enumerate(tracks, 1):
-        spotify_id = track.get("spotify_id")
-        song_title = track.get("song_title", "Unknown")
-        output_path = f"songs/{spotify_id}.mp3"
-        
-        # Skip if already exists
-        if os.path.exists(output_path):
-            continue
-            
-        print(f"[{i}/{len(tracks)}] {song_title}")
-        
-        try:
-            if download_song(track):
-                success_count += 1
-            else:
-                fail_count += 1
-        except KeyboardInterrupt:
-            print(f"\n⏹️  Download stopped by user")
-            break
-        except Exception as e:
-            logging.error(f"❌ Unexpected error downloading '{song_title}': {e}")
-            fail_count += 1
+    # Download tracks in parallel
+    results = download_tracks(get_pending_tracks(tracks, archive.downloaded), archive=archive)
+    success_count = results["success"]
+    fail_count = results["failed"]
 
     # Final statistics
     total_attempted = success_count + fail_count
@@ -201,6 +174,8 @@ def download_mp3s() -> bool:
     print(f"📊 DOWNLOAD SUMMARY")
     print(f"=" * 60)
     print(f"✅ Successful downloads: {success_count}")
+    print(f"   🎯 Via direct YouTube URL: {results['direct']}")
+    print(f"   🔍 Via search fallback: {results['search']}")
     print(f"❌ Failed downloads: {fail_count}")
     print(f"📈 Success rate: {final_success_rate:.1f}%")
     print(f"📁 Files saved to: songs/ folder")
@@ -1,14 +1,52 @@
 import os
-import json
+import atexit
+import pickle
+import asyncio
+import diskcache
 import spotipy
-import requests
+import aiohttp
 import time
 import logging
+import threading
+from aiolimiter import AsyncLimiter
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 from spotipy.oauth2 import SpotifyOAuth
 from spotipy.exceptions import SpotifyException
-from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, FrozenSet
 from dotenv import load_dotenv
 
+# orjson is much faster for the metadata files, but optional
+try:
+    import orjson
+
+    def _dumps_line(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    def _dumps_line(obj) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+    _loads = json.loads
+
+__all__ = [
+    "METADATA_FILE",
+    "PROGRESS_FILE",
+    "SpotifyQuotaExceeded",
+    "SpotifyConnectionError",
+    "RateLimiter",
+    "test_spotify_connection",
+    "safe_spotify_call",
+    "read_playlist_url_from_file",
+    "extract_playlist_id",
+    "get_artists_bulk",
+    "get_odesli_links_bulk",
+    "get_playlist_tracks",
+]
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -18,8 +56,29 @@ SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
 SPOTIFY_REDIRECT_URI = os.getenv("SPOTIFY_REDIRECT_URI", "http://127.0.0.1:8000/callback")
 SCOPE = "playlist-read-private"
 
-# Progress tracking
-PROGRESS_FILE = "metadata/download_progress.json"
+# Odesli (Song.link) lookups
+ODESLI_API_URL = "https://api.song.link/v1-alpha.1/links"
+ODESLI_CONCURRENCY = 16
+ODESLI_CONNECTIONS_PER_HOST = 64
+ODESLI_RATE_LIMIT = 10  # requests per ODESLI_RATE_PERIOD seconds
+ODESLI_RATE_PERIOD = 1.0
+ODESLI_MAX_ATTEMPTS = 4
+ODESLI_CACHE_DIR = "metadata/.odesli_cache"
+ODESLI_CACHE_TTL = 60 * 60 * 24 * 30  # 30 days
+
+# Client-side throttling for the Spotify Web API
+SPOTIFY_RATE_LIMIT = 10  # requests per SPOTIFY_RATE_PERIOD seconds
+SPOTIFY_RATE_PERIOD = 1.0
+SPOTIFY_MAX_ATTEMPTS = 6
+
+# Output and progress tracking (JSON Lines, one track per line)
+METADATA_FILE = "metadata/spotify_playlist_metadata.jsonl"
+PROGRESS_FILE = "metadata/download_progress.jsonl"
+ARTIST_CACHE_FILE = "metadata/artist_cache.pkl"
+ARTISTS_BATCH_SIZE = 50  # Spotify's limit for GET /v1/artists
+PLAYLIST_PAGE_SIZE = 100  # Spotify's limit for GET /v1/playlists/{id}/tracks
+PLAYLIST_PAGE_WORKERS = 10
+TRACK_BATCH_SIZE = 100  # tracks resolved and saved to PROGRESS_FILE together
 
 # Initialize Spotify client
 sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
@@ -38,6 +97,70 @@ class SpotifyConnectionError(Exception):
     """Custom exception for connection errors"""
     pass
 
+class RateLimiter:
+    """Thread-safe token bucket allowing `max_calls` calls per `period` seconds"""
+
+    def __init__(self, max_calls: int, period: float):
+        self.capacity = max_calls
+        self.rate = max_calls / period
+        self.tokens = float(max_calls)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+spotify_limiter = RateLimiter(SPOTIFY_RATE_LIMIT, SPOTIFY_RATE_PERIOD)
+
+def retry_after_seconds(headers) -> float:
+    """Parse a Retry-After header (in seconds), returning 0 if absent or malformed"""
+    try:
+        return max(0.0, float((headers or {}).get("Retry-After")))
+    except (TypeError, ValueError):
+        return 0.0
+
+def _is_retryable_spotify_error(e: BaseException) -> bool:
+    return isinstance(e, SpotifyException) and (e.http_status == 429 or (e.http_status or 0) >= 500)
+
+_spotify_backoff = wait_exponential(min=1, max=60)
+
+def _spotify_wait(retry_state) -> float:
+    """Honor Spotify's Retry-After header, else back off exponentially"""
+    e = retry_state.outcome.exception()
+    return retry_after_seconds(getattr(e, "headers", None)) or _spotify_backoff(retry_state)
+
+def _log_spotify_retry(retry_state):
+    """Log a retry that is about to happen (not called once attempts run out)"""
+    e = retry_state.outcome.exception()
+    logging.warning(f"⏳ Spotify returned {e.http_status}, retrying in {retry_state.next_action.sleep:.1f}s...")
+
+@retry(
+    retry=retry_if_exception(_is_retryable_spotify_error),
+    wait=_spotify_wait,
+    before_sleep=_log_spotify_retry,
+    stop=stop_after_attempt(SPOTIFY_MAX_ATTEMPTS),
+    reraise=True
+)
+def _throttled_call(func, *args, **kwargs):
+    with spotify_limiter:
+        return func(*args, **kwargs)
+
 def test_spotify_connection() -> Tuple[bool, str]:
     """Test if Spotify API is working before starting"""
     try:
@@ -58,9 +181,9 @@ def test_spotify_connection() -> Tuple[bool, str]:
         return False, f"❌ Connection failed: {e}"
 
 def safe_spotify_call(func, *args, **kwargs):
-    """Make Spotify API calls with proper error handling"""
+    """Make Spotify API calls with throttling, retries and proper error handling"""
     try:
-        return func(*args, **kwargs)
+        return _throttled_call(func, *args, **kwargs)
     except SpotifyException as e:
         if e.http_status == 429:
             logging.error("❌ Rate limit exceeded. Saving progress and exiting...")
@@ -78,37 +201,33 @@ def safe_spotify_call(func, *args, **kwargs):
         logging.error(f"❌ Unexpected error in Spotify call: {e}")
         raise SpotifyConnectionError(f"Unexpected error: {e}")
 
-def save_progress(tracks: List[Dict], current_index: int = 0):
-    """Save current progress to resume later"""
+def append_progress(f, tracks: List[Dict]):
+    """Append finished tracks to an open progress file, one JSON object per line"""
+    f.write(b"".join(_dumps_line(track_data) for track_data in tracks))
+    f.flush()
+
+def save_progress(tracks: List[Dict]):
+    """Rewrite the progress file from scratch with the given tracks"""
     os.makedirs("metadata", exist_ok=True)
-    progress_data = {
-        "tracks": tracks,
-        "current_index": current_index,
-        "timestamp": time.time(),
-        "total_tracks": len(tracks)
-    }
-    
-    with open(PROGRESS_FILE, "w", encoding="utf-8") as f:
-        json.dump(progress_data, f, indent=2, ensure_ascii=False)
-    
-    logging.info(f"💾 Progress saved: {current_index}/{len(tracks)} tracks processed")
+    with open(PROGRESS_FILE, "wb") as f:
+        append_progress(f, tracks)
 
-def load_progress() -> Tuple[List[Dict], int]:
-    """Load previous progress if exists"""
+def load_progress() -> List[Dict]:
+    """Load tracks saved by a previous, interrupted run"""
+    tracks = []
     if os.path.exists(PROGRESS_FILE):
-        try:
-            with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            tracks = data.get("tracks", [])
-            current_index = data.get("current_index", 0)
-            
-            logging.info(f"📂 Resuming from progress: {current_index}/{len(tracks)} tracks")
-            return tracks, current_index
-        except Exception as e:
-            logging.warning(f"⚠️ Could not load progress file: {e}")
-    
-    return [], 0
+        with open(PROGRESS_FILE, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    tracks.append(_loads(line))
+                except ValueError as e:
+                    # A crash mid-write can leave a truncated last line
+                    logging.warning(f"⚠️ Skipping unreadable progress entry: {e}")
+
+        logging.info(f"📂 Found progress: {len(tracks)} tracks")
+    return tracks
 
 def read_playlist_url_from_file(filepath="spotify_playlist.txt") -> str:
     if not os.path.exists(filepath):
@@ -123,163 +242,258 @@ def read_playlist_url_from_file(filepath="spotify_playlist.txt") -> str:
 def extract_playlist_id(playlist_url: str) -> str:
     return playlist_url.split("/")[-1].split("?")[0]
 
-def get_artist_metadata(artist_id: str) -> Dict:
-    try:
-        artist = safe_spotify_call(sp.artist, artist_id)
-        return {
-            "genres": artist.get("genres", []),
-            "popularity": artist.get("popularity", 0)
-        }
-    except (SpotifyQuotaExceeded, SpotifyConnectionError):
-        raise  # Re-raise quota/connection errors
-    except Exception as e:
-        logging.warning(f"⚠️ Could not get artist metadata for {artist_id}: {e}")
-        return {"genres": [], "popularity": 0}
+def load_artist_cache() -> Dict[str, Tuple[FrozenSet[str], int]]:
+    """Load artist metadata cached by previous runs"""
+    if os.path.exists(ARTIST_CACHE_FILE):
+        try:
+            with open(ARTIST_CACHE_FILE, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logging.warning(f"⚠️ Could not load artist cache: {e}")
+    return {}
+
+_artist_cache = load_artist_cache()
+
+def save_artist_cache():
+    """Persist artist metadata so later runs skip repeat lookups"""
+    if not _artist_cache:
+        return
+    os.makedirs("metadata", exist_ok=True)
+    with open(ARTIST_CACHE_FILE, "wb") as f:
+        pickle.dump(_artist_cache, f)
+
+atexit.register(save_artist_cache)
+
+def get_artists_bulk(artist_ids: List[str]) -> Dict[str, Tuple[FrozenSet[str], int]]:
+    """Fetch (genres, popularity) for many artists, up to 50 IDs per request"""
+    metadata = {a: _artist_cache[a] for a in artist_ids if a in _artist_cache}
+    missing = [a for a in artist_ids if a not in metadata]
+
+    for start in range(0, len(missing), ARTISTS_BATCH_SIZE):
+        chunk = missing[start:start + ARTISTS_BATCH_SIZE]
+        logging.info(f"🎤 Fetching artist metadata {start + len(chunk)}/{len(missing)}")
+        for artist in safe_spotify_call(sp.artists, chunk)["artists"]:
+            if not artist:
+                continue
+            entry = (frozenset(artist.get("genres", [])), artist.get("popularity", 0))
+            _artist_cache[artist["id"]] = entry
+            metadata[artist["id"]] = entry
+
+    return metadata
+
+# Successful Odesli responses persist across runs, keyed on spotify_url
+odesli_cache = diskcache.Cache(ODESLI_CACHE_DIR)
 
-def get_odesli_links(spotify_url: str) -> Dict:
-    """Fetch YouTube and Apple Music links from Odesli (Song.link)."""
+async def fetch_odesli(session: aiohttp.ClientSession, spotify_url: str,
+                       sem: asyncio.Semaphore, limiter: AsyncLimiter) -> Dict:
+    """Fetch YouTube and Apple Music links from Odesli (Song.link).
+
+    Bounded by a shared semaphore and rate limiter; 429s are retried.
+    """
     try:
-        resp = requests.get(
-            "https://api.song.link/v1-alpha.1/links", 
-            params={"url": spotify_url}, 
-            timeout=10
-        )
-        if resp.ok:
-            data = resp.json().get("linksByPlatform", {})
-            youtube_url = data.get("youtube", {}).get("url")
-            apple_music_url = data.get("appleMusic", {}).get("url")
-            
-            if youtube_url:
-                logging.debug(f"✅ Found YouTube URL via Odesli: {youtube_url}")
-            else:
-                logging.debug("⚠️ No YouTube URL found via Odesli")
-                
-            return {
-                "youtube_url": youtube_url,
-                "apple_music_url": apple_music_url
-            }
-        else:
-            logging.warning(f"⚠️ Odesli API returned status {resp.status_code}")
-    except requests.exceptions.Timeout:
+        for attempt in range(ODESLI_MAX_ATTEMPTS):
+            async with sem:
+                async with limiter, session.get(
+                    ODESLI_API_URL,
+                    params={"url": spotify_url},
+                    timeout=aiohttp.ClientTimeout(total=10)
+                ) as resp:
+                    if resp.status == 200:
+                        data = (await resp.json()).get("linksByPlatform", {})
+                        youtube_url = data.get("youtube", {}).get("url")
+                        apple_music_url = data.get("appleMusic", {}).get("url")
+
+                        if youtube_url:
+                            logging.debug(f"✅ Found YouTube URL via Odesli: {youtube_url}")
+                        else:
+                            logging.debug("⚠️ No YouTube URL found via Odesli")
+
+                        links = {
+                            "youtube_url": youtube_url,
+                            "apple_music_url": apple_music_url
+                        }
+                        odesli_cache.set(spotify_url, links, expire=ODESLI_CACHE_TTL)
+                        return links
+                    elif resp.status == 429 and attempt + 1 < ODESLI_MAX_ATTEMPTS:
+                        delay = retry_after_seconds(resp.headers) or min(60, 2 ** attempt)
+                        logging.debug(f"⏳ Odesli rate limited, retrying in {delay:.1f}s...")
+                    else:
+                        logging.warning(f"⚠️ Odesli API returned status {resp.status}")
+                        break
+            await asyncio.sleep(delay)
+    except asyncio.TimeoutError:
         logging.warning("⚠️ Odesli request timed out")
     except Exception as e:
         logging.warning(f"⚠️ Odesli request failed: {e}")
-    
+
     return {
         "youtube_url": None,
         "apple_music_url": None
     }
 
+async def _gather_odesli(spotify_urls: List[str]) -> List[Dict]:
+    sem = asyncio.Semaphore(ODESLI_CONCURRENCY)
+    limiter = AsyncLimiter(ODESLI_RATE_LIMIT, ODESLI_RATE_PERIOD)
+    connector = aiohttp.TCPConnector(limit_per_host=ODESLI_CONNECTIONS_PER_HOST)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        return await asyncio.gather(*(fetch_odesli(session, url, sem, limiter) for url in spotify_urls))
+
+def get_odesli_links_bulk(spotify_urls: List[str]) -> List[Dict]:
+    """Fetch Odesli links for many tracks concurrently, preserving input order.
+
+    Cached responses are served from disk; only misses go to the network.
+    """
+    results = [odesli_cache.get(url) for url in spotify_urls]
+    missing = [i for i, links in enumerate(results) if links is None]
+    if missing:
+        logging.info(f"🔗 Fetching Odesli links for {len(missing)}/{len(spotify_urls)} uncached tracks...")
+        fetched = asyncio.run(_gather_odesli([spotify_urls[i] for i in missing]))
+        for i, links in zip(missing, fetched):
+            results[i] = links
+    return results
+
+def get_playlist_page(playlist_id: str, offset: int = 0) -> Dict:
+    return safe_spotify_call(
+        sp.playlist_items, playlist_id,
+        limit=PLAYLIST_PAGE_SIZE, offset=offset, additional_types=["track"]
+    )
+
+def get_remaining_pages(playlist_id: str, first_page: Dict) -> List[Dict]:
+    """Fetch the pages after `first_page` concurrently, using its `total` to plan offsets"""
+    offsets = range(PLAYLIST_PAGE_SIZE, first_page.get("total", 0), PLAYLIST_PAGE_SIZE)
+    if not offsets:
+        return []
+
+    logging.info(f"📄 Fetching {len(offsets)} more playlist pages...")
+    with ThreadPoolExecutor(max_workers=PLAYLIST_PAGE_WORKERS) as executor:
+        return list(executor.map(lambda offset: get_playlist_page(playlist_id, offset), offsets))
+
+_UNKNOWN_ARTIST = (frozenset(), 0)
+
+def build_track_data(track: Dict, artist_meta: Dict[str, Tuple[FrozenSet[str], int]]) -> Dict:
+    """Assemble a track's metadata from its Spotify object and resolved artists"""
+    title = track['name']
+    duration_sec = track['duration_ms'] // 1000
+    album_name = track['album']['name']
+    artist_list = track['artists']
+    spotify_url = track['external_urls']['spotify']
+    spotify_id = track['id']
+    track_popularity = track.get('popularity', 0)
+
+    artists = [{"name": artist['name'], "role": "primary"} for artist in artist_list]
+    genres = {
+        genre
+        for artist in artist_list
+        for genre in artist_meta.get(artist.get('id'), _UNKNOWN_ARTIST)[0]
+    }
+    artist_popularity = artist_meta.get(artist_list[0].get('id'), _UNKNOWN_ARTIST)[1] if artist_list else 0
+
+    album = {
+        "title": album_name,
+        "main_artist_name": artists[0]["name"]
+    }
+
+    # YouTube and Apple Music links are filled in from Odesli afterwards
+    return {
+        "spotify_id": spotify_id,
+        "spotify_url": spotify_url,
+        "youtube_url": None,
+        "apple_music_url": None,
+        "song_title": title,
+        "duration": duration_sec,
+        "track_popularity": track_popularity,
+        "artist_popularity": artist_popularity,
+        "artists": artists,
+        "album": album,
+        "genres": list(genres)
+    }
+
+def get_batch_artists(playlist_tracks: List[Dict]) -> Dict[str, Tuple[FrozenSet[str], int]]:
+    """One batched lookup for every artist in a batch of Spotify track objects"""
+    artist_ids = {a['id']: None for t in playlist_tracks for a in t['artists'] if a.get('id')}
+    return get_artists_bulk(list(artist_ids))
+
+def build_track_batch(playlist_tracks: List[Dict], artist_meta: Dict[str, Tuple[FrozenSet[str], int]]) -> List[Dict]:
+    """Assemble a batch of Spotify track objects and resolve their Odesli links"""
+    tracks = []
+    for track in playlist_tracks:
+        try:
+            tracks.append(build_track_data(track, artist_meta))
+        except Exception as e:
+            logging.warning(f"⚠️ Error processing track '{track.get('name', 'Unknown')}': {e}")
+
+    # 🎯 Get YouTube and Apple Music links from Odesli, fanned out concurrently
+    external_links = get_odesli_links_bulk([t["spotify_url"] for t in tracks])
+    for track_data, links in zip(tracks, external_links):
+        track_data["youtube_url"] = links.get("youtube_url")
+        track_data["apple_music_url"] = links.get("apple_music_url")
+
+    return tracks
+
 def get_playlist_tracks(playlist_url: str) -> List[Dict]:
-    """Get playlist tracks with robust error handling and progress saving"""
+    """Get playlist tracks with robust error handling and progress saving.
+
+    Finished tracks are streamed to PROGRESS_FILE as JSON Lines, so an
+    interrupted run can resume where it stopped. On success the progress
+    file becomes METADATA_FILE.
+    """
     
     # Check if we have previous progress
-    existing_tracks, start_index = load_progress()
-    if existing_tracks:
-        user_input = input(f"📂 Found previous progress ({start_index}/{len(existing_tracks)} tracks). Continue? (y/n): ")
+    tracks = load_progress()
+    if tracks:
+        user_input = input(f"📂 Found previous progress ({len(tracks)} tracks). Continue? (y/n): ")
         if user_input.lower() == 'y':
-            return existing_tracks
+            # Rewrite so appends never follow a truncated line
+            save_progress(tracks)
         else:
-            # Clear progress file
-            if os.path.exists(PROGRESS_FILE):
-                os.remove(PROGRESS_FILE)
+            tracks = []
+    if not tracks and os.path.exists(PROGRESS_FILE):
+        os.remove(PROGRESS_FILE)
+    done_ids = {t.get("spotify_id") for t in tracks}
     
     playlist_id = extract_playlist_id(playlist_url)
     
     try:
-        results = safe_spotify_call(sp.playlist_items, playlist_id, additional_types=["track"])
+        first_page = get_playlist_page(playlist_id)
     except (SpotifyQuotaExceeded, SpotifyConnectionError) as e:
         logging.error(f"❌ Failed to fetch playlist: {e}")
         return []
-    
-    tracks = []
-    track_count = 0
 
-    while results:
-        for item in results['items']:
+    pages = [first_page, *get_remaining_pages(playlist_id, first_page)]
+
+    # Walk the playlist pages, collecting tracks not saved by a previous run
+    playlist_tracks = []
+
+    for page in pages:
+        for item in page['items']:
             track = item['track']
-            if not track:
+            if not track or track.get('id') in done_ids:
                 continue
 
-            track_count += 1
-            logging.info(f"📥 Processing track {track_count}: {track['name']}")
-
-            try:
-                title = track['name']
-                duration_ms = track['duration_ms']
-                duration_sec = int(duration_ms / 1000)
-                spotify_url = track['external_urls']['spotify']
-                spotify_id = track['id']
-                track_popularity = track.get('popularity', 0)
-
-                artists = []
-                genres = set()
-                artist_popularity = 0
-
-                for i, artist in enumerate(track['artists']):
-                    artists.append({"name": artist['name'], "role": "primary"})
-                    try:
-                        metadata = get_artist_metadata(artist['id'])
-                        genres.update(metadata["genres"])
-                        if i == 0:
-                            artist_popularity = metadata["popularity"]
-                    except (SpotifyQuotaExceeded, SpotifyConnectionError):
-                        # Save progress and exit
-                        save_progress(tracks, track_count - 1)
-                        raise
-
-                album = {
-                    "title": track['album']['name'],
-                    "main_artist_name": artists[0]["name"]
-                }
-
-                # 🎯 Get YouTube and Apple Music links from Odesli
-                external_links = get_odesli_links(spotify_url)
-
-                track_data = {
-                    "spotify_id": spotify_id,
-                    "spotify_url": spotify_url,
-                    "youtube_url": external_links.get("youtube_url"),
-                    "apple_music_url": external_links.get("apple_music_url"),
-                    "song_title": title,
-                    "duration": duration_sec,
-                    "track_popularity": track_popularity,
-                    "artist_popularity": artist_popularity,
-                    "artists": artists,
-                    "album": album,
-                    "genres": list(genres)
-                }
-
-                tracks.append(track_data)
-
-                # Save progress every 10 tracks
-                if track_count % 10 == 0:
-                    save_progress(tracks, track_count)
-
-            except (SpotifyQuotaExceeded, SpotifyConnectionError):
-                # Save progress and re-raise
-                save_progress(tracks, track_count - 1)
-                raise
-            except Exception as e:
-                logging.warning(f"⚠️ Error processing track '{track.get('name', 'Unknown')}': {e}")
-                continue
+            playlist_tracks.append(track)
+            logging.info(f"📥 Processing track {len(playlist_tracks)}: {track['name']}")
 
-        # Get next page
-        try:
-            if results.get("next"):
-                results = safe_spotify_call(sp.next, results)
-            else:
-                break
-        except (SpotifyQuotaExceeded, SpotifyConnectionError):
-            # Save progress and exit
-            save_progress(tracks, track_count)
-            raise
-
-    # Save final progress
-    save_progress(tracks, track_count)
-    
-    # Clean up progress file on successful completion
-    if os.path.exists(PROGRESS_FILE):
-        os.remove(PROGRESS_FILE)
+    if done_ids:
+        logging.info(f"⏭️  Skipping {len(done_ids)} tracks saved by a previous run")
+
+    # Resolve and save tracks batch by batch; an error keeps earlier batches on disk.
+    # The next batch's Spotify artist lookup runs in the background while the
+    # current batch waits on Odesli, so the two services overlap.
+    batches = [playlist_tracks[i:i + TRACK_BATCH_SIZE] for i in range(0, len(playlist_tracks), TRACK_BATCH_SIZE)]
+    os.makedirs("metadata", exist_ok=True)
+    with ThreadPoolExecutor(max_workers=1) as prefetcher, open(PROGRESS_FILE, "ab") as progress:
+        next_artists = prefetcher.submit(get_batch_artists, batches[0]) if batches else None
+        for k, batch in enumerate(batches):
+            artist_meta = next_artists.result()
+            if k + 1 < len(batches):
+                next_artists = prefetcher.submit(get_batch_artists, batches[k + 1])
+
+            batch_tracks = build_track_batch(batch, artist_meta)
+            append_progress(progress, batch_tracks)
+            tracks.extend(batch_tracks)
+            logging.info(f"💾 Progress saved: {len(tracks)} tracks processed")
+
+    # The run is complete: promote the progress file to the final metadata file
+    os.replace(PROGRESS_FILE, METADATA_FILE)
     
-    return tracks
\ No newline at end of file
+    return tracks
@@ -1,156 +1,474 @@
 import os
+import re
+import copy
 import json
+import time
+import zlib
+import queue
+import atexit
 import logging
+import logging.handlers
+import threading
+import subprocess
 import yt_dlp
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Set, Iterator, Iterable
+
+# orjson parses the metadata file several times faster, but is optional
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+__all__ = [
+    "METADATA_FILE",
+    "SONGS_DIR",
+    "configure_logging",
+    "iter_metadata",
+    "load_metadata",
+    "download_song",
+    "download_tracks",
+    "DownloadArchive",
+    "get_downloaded_ids",
+    "get_pending_tracks",
+    "get_download_stats",
+    "print_download_stats",
+]
 
 # Paths
-METADATA_FILE = "metadata/spotify_playlist_metadata.json"
+METADATA_FILE = "metadata/spotify_playlist_metadata.jsonl"
+ARCHIVE_FILE = "metadata/.download_archive.json"
 SONGS_DIR = Path("songs")
 SONGS_DIR.mkdir(parents=True, exist_ok=True)
+FETCH_DIR = SONGS_DIR / ".tmp"  # raw audio waiting to be transcoded
+FETCH_DIR.mkdir(parents=True, exist_ok=True)
+
+# Optional outbound proxies (comma-separated). YouTube throttles per client,
+# so each track is pinned to one proxy and the workers scale with their count
+YTDL_PROXIES = [p.strip() for p in os.getenv("YTDL_PROXIES", "").split(",") if p.strip()]
+
+# Parallel downloads (kept low per proxy to avoid YouTube throttling)
+MAX_DOWNLOAD_WORKERS = int(os.getenv("YTDL_WORKERS", str(4 * max(1, len(YTDL_PROXIES)))))
+# Parallel mp3 transcodes, overlapping with the network-bound downloads;
+# libmp3lame is single-threaded, so run one encode per core
+FFMPEG_WORKERS = os.cpu_count() or 2
+MP3_BITRATE = "320k"
+
+# Throttling against YouTube: cap per-download bandwidth (bytes/s) and the
+# number of requests in flight per outbound address, and back off when a
+# 429 still gets through
+YTDL_RATE = int(os.getenv("YTDL_RATE", "1500000"))
+HOST_SEMS = {
+    proxy: threading.BoundedSemaphore(int(os.getenv("YTDL_HOST_CONC", "4")))
+    for proxy in (YTDL_PROXIES or [None])
+}
+MAX_429_ATTEMPTS = 5
+
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_logging():
+    """Log to download_log.txt and the console (shared by both entry points).
+
+    Records are handed to a queue; a single background listener thread does
+    the actual file and console writes, so download workers never block on I/O.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+
+    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    handlers = [logging.FileHandler("download_log.txt"), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
 
-# Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("download_log.txt"),
-        logging.StreamHandler()
-    ]
-)
-
-# yt-dlp config
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+# yt-dlp config: fetch raw audio only, mp3 transcoding runs as a separate stage
 YDL_OPTIONS = {
     'format': 'bestaudio/best',
     'quiet': True,
     'no_warnings': True,
-    'postprocessors': [{
-        'key': 'FFmpegExtractAudio',
-        'preferredcodec': 'mp3',
-        'preferredquality': '320',
-    }]
+    # Send yt-dlp's own messages through the logging queue instead of stderr
+    'logger': logging.getLogger("yt_dlp"),
+    # Fetch DASH fragments in parallel over larger HTTP chunks
+    'concurrent_fragment_downloads': 4,
+    'http_chunk_size': 10 * 1024 * 1024,
+    'retries': 10,
+    'fragment_retries': 10,
+    'socket_timeout': 15,
+    # Spread requests out so parallel workers don't trip YouTube's 429s
+    'ratelimit': YTDL_RATE,
+    'sleep_interval': 2,
+    'max_sleep_interval': 6,
 }
 
-def load_metadata() -> List[Dict]:
-    """Load metadata from JSON file."""
+# Watch-page or short links only; anchored so look-alike hosts don't match
+_YT_RE = re.compile(r"https?://(?:www\.|m\.|music\.)?(?:youtube\.com/watch|youtu\.be/)")
+
+# One YoutubeDL per worker thread: instances are not thread-safe, but are
+# expensive enough to build that they should be reused across tracks
+_thread_local = threading.local()
+
+def proxy_for(spotify_id: str) -> Optional[str]:
+    """Deterministically pick the proxy a track is downloaded through"""
+    if not YTDL_PROXIES:
+        return None
+    return YTDL_PROXIES[zlib.crc32(spotify_id.encode()) % len(YTDL_PROXIES)]
+
+def get_thread_ydl(proxy: Optional[str] = None) -> yt_dlp.YoutubeDL:
+    """Return this thread's YoutubeDL instance for `proxy`, creating it on first use"""
+    instances = getattr(_thread_local, "ydls", None)
+    if instances is None:
+        instances = _thread_local.ydls = {}
+    ydl = instances.get(proxy)
+    if ydl is None:
+        # Deep copy so no nested option is shared between threads; the outtmpl
+        # dict in particular is rewritten per track
+        params = copy.deepcopy(YDL_OPTIONS)
+        params['outtmpl'] = {'default': str(FETCH_DIR / '%(id)s.%(ext)s')}
+        if proxy:
+            params['proxy'] = proxy
+        ydl = instances[proxy] = yt_dlp.YoutubeDL(params)
+    return ydl
+
+def iter_metadata() -> Iterator[Dict]:
+    """Stream tracks from the JSON Lines metadata file as each line is parsed."""
     if not os.path.exists(METADATA_FILE):
         logging.error(f"Metadata file not found: {METADATA_FILE}")
-        return []
+        return
     
-    with open(METADATA_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    with open(METADATA_FILE, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield _loads(line)
+
+def load_metadata() -> List[Dict]:
+    """Load metadata from JSON Lines file."""
+    return list(iter_metadata())
 
 def validate_youtube_url(url: str) -> Tuple[bool, str]:
-    """Check if YouTube URL is valid and accessible"""
+    """Check that a URL looks like a YouTube video link.
+
+    This is a local format check only; whether the video is actually
+    available is found out by the download attempt itself.
+    """
     if not url:
         return False, "No URL provided"
     
     # Check URL format
-    if not any(domain in url for domain in ["youtube.com", "youtu.be"]):
+    if not _YT_RE.match(url):
         return False, "Invalid YouTube URL format"
     
-    # Quick test if video exists
-    try:
-        with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
-            info = ydl.extract_info(url, download=False)
-            if info:
-                return True, "Valid URL"
-    except Exception as e:
-        return False, f"Video not accessible: {str(e)[:100]}"
-    
-    return False, "Unknown validation error"
+    return True, "Valid URL"
 
 def build_search_query(track: dict) -> str:
     """Build a search query from song title and first primary artist."""
     title = track.get("song_title", "")
-    artists = [a["name"] for a in track.get("artists", []) if a["role"] == "primary"]
-    artist = artists[0] if artists else ""
+    artist = next((a["name"] for a in track.get("artists", ()) if a["role"] == "primary"), "")
     return f"{title} {artist}".strip()
 
-def download_with_direct_url(track: dict, youtube_url: str, output_path: Path) -> Tuple[bool, str]:
-    """Download using direct YouTube URL"""
-    ydl_opts = YDL_OPTIONS.copy()
-    ydl_opts['outtmpl'] = str(output_path.with_suffix('.%(ext)s'))
-    
-    try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([youtube_url])
-        return True, "Downloaded successfully using direct URL"
-    except Exception as e:
-        return False, f"Direct URL download failed: {str(e)[:200]}"
+def _fetched_path(info: Optional[Dict]) -> Optional[Path]:
+    """Locate the file yt-dlp wrote for a video or single-result search"""
+    if info and "entries" in info:
+        info = next((e for e in info["entries"] if e), None)
+    downloads = (info or {}).get("requested_downloads") or []
+    return Path(downloads[0]["filepath"]) if downloads else None
 
-def download_with_search(track: dict, output_path: Path) -> Tuple[bool, str]:
-    """Download using YouTube search as fallback"""
-    query = build_search_query(track)
-    search_url = f"ytsearch1:{query}"
-    
-    ydl_opts = YDL_OPTIONS.copy()
-    ydl_opts['outtmpl'] = str(output_path.with_suffix('.%(ext)s'))
-    
-    try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([search_url])
-        return True, f"Downloaded successfully using search: '{query}'"
-    except Exception as e:
-        return False, f"Search download failed: {str(e)[:200]}"
+def _is_throttled(error: yt_dlp.utils.DownloadError) -> bool:
+    """Whether a download failed because YouTube answered HTTP 429"""
+    # The HTTP error is usually wrapped in an ExtractorError's `cause`
+    cause = (error.exc_info or (None, None))[1]
+    while cause is not None:
+        if isinstance(cause, yt_dlp.networking.exceptions.HTTPError):
+            return cause.status == 429
+        cause = getattr(cause, "cause", None) or cause.__cause__
+    return "HTTP Error 429" in str(error)
+
+def _download(ydl: yt_dlp.YoutubeDL, url: str, outtmpl: str) -> Path:
+    """Fetch raw audio for a URL or ytsearch query to the `outtmpl` template.
+
+    Reuses the caller's YoutubeDL, only pointing its output template at this
+    track. HTTP 429s are retried with exponential backoff; any other error
+    is raised.
+    """
+    ydl.params['outtmpl']['default'] = outtmpl
+    for attempt in range(MAX_429_ATTEMPTS):
+        try:
+            with HOST_SEMS[ydl.params.get('proxy')]:
+                info = ydl.extract_info(url)
+            break
+        except yt_dlp.utils.DownloadError as e:
+            if not _is_throttled(e) or attempt == MAX_429_ATTEMPTS - 1:
+                raise
+            delay = min(60, 2 ** attempt)
+            logging.warning(f"⏳ Throttled by YouTube (429), retrying in {delay}s...")
+            time.sleep(delay)
+
+    path = _fetched_path(info)
+    if path is None:
+        raise yt_dlp.utils.DownloadError(f"no file was written for {url}")
+    return path
+
+def fetch_song(track: dict, index: int = 0, total: int = 0) -> Tuple[Optional[Path], str]:
+    """Fetch a song's raw audio using direct URL first, then fallback to search.
 
-def download_song(track: dict) -> bool:
-    """Download song using direct URL first, then fallback to search"""
+    `index`/`total` give the track's position in the current run for logging.
+    Returns (path, method) where path is None on failure and method is
+    "direct" or "search".
+    """
     spotify_id = track.get("spotify_id")
     song_title = track.get("song_title", "Unknown")
     youtube_url = track.get("youtube_url")
     
-    output_path = SONGS_DIR / f"{spotify_id}.mp3"
+    # Output template for either download method, built once per track
+    outtmpl = f"{FETCH_DIR}/{spotify_id}.%(ext)s"
+    proxy = proxy_for(spotify_id)
 
-    # Check if already exists
-    if output_path.exists():
-        logging.info(f"⏭️  Already exists: {song_title}")
-        return True
-
-    logging.info(f"🎵 Processing: {song_title}")
+    position = f"[{index}/{total}] " if total else ""
+    logging.info(f"{position}🎵 Processing: {song_title}")
 
-    # Method 1: Try direct YouTube URL first (if available)
+    # Candidate sources in order of preference: the direct YouTube URL (if
+    # available and well-formed), then a text search
+    candidates = []
     if youtube_url:
-        logging.debug(f"🎯 Trying direct URL: {youtube_url}")
-        
-        # Validate URL first
         is_valid, validation_msg = validate_youtube_url(youtube_url)
         if is_valid:
-            success, msg = download_with_direct_url(track, youtube_url, output_path)
-            if success:
-                logging.info(f"✅ {msg}")
-                return True
-            else:
-                logging.warning(f"⚠️  Direct URL failed: {msg}")
+            candidates.append(("direct", youtube_url))
         else:
             logging.warning(f"⚠️  Invalid URL: {validation_msg}")
     else:
         logging.debug("🔍 No direct YouTube URL available")
+    candidates.append(("search", f"ytsearch1:{build_search_query(track)}"))
 
-    # Method 2: Fallback to text search
-    logging.debug("🔍 Falling back to YouTube search...")
-    success, msg = download_with_search(track, output_path)
-    
-    if success:
-        logging.info(f"✅ {msg}")
+    # One YoutubeDL for every attempt; stop at the first source that works
+    ydl = get_thread_ydl(proxy)
+    for method, url in candidates:
+        try:
+            path = _download(ydl, url, outtmpl)
+            logging.info(f"✅ [{method}] Downloaded successfully from {url}")
+            return path, method
+        except Exception as e:
+            logging.warning(f"⚠️  [{method}] {url} failed: {str(e)[:200]}")
+
+    logging.error(f"❌ All methods failed for '{song_title}'")
+    return None, "search"
+
+def transcode_song(track: dict, source: Path) -> bool:
+    """Transcode fetched audio to SONGS_DIR/<spotify_id>.mp3 and remove the source"""
+    song_title = track.get("song_title", "Unknown")
+    output_path = SONGS_DIR / f"{track.get('spotify_id')}.mp3"
+    # Encode next to the source and move into place once complete, so a
+    # half-written mp3 is never mistaken for a finished download
+    partial_path = source.with_suffix(".mp3")
+
+    try:
+        subprocess.run(
+            ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-i", str(source),
+             "-vn", "-c:a", "libmp3lame",
+             "-b:a", MP3_BITRATE, "-compression_level", "7", str(partial_path)],
+            check=True, capture_output=True, text=True
+        )
+        os.replace(partial_path, output_path)
+        logging.info(f"🎚️  Converted to mp3: {song_title}")
         return True
-    else:
-        logging.error(f"❌ All methods failed for '{song_title}': {msg}")
-        return False
+    except subprocess.CalledProcessError as e:
+        logging.error(f"❌ ffmpeg failed for '{song_title}': {e.stderr.strip()[:200]}")
+    except Exception as e:
+        logging.error(f"❌ Could not convert '{song_title}': {e}")
+    finally:
+        for leftover in (source, partial_path):
+            leftover.unlink(missing_ok=True)
+    return False
+
+def download_song(track: dict, index: int = 0, total: int = 0) -> Tuple[bool, str]:
+    """Download and convert a single song (fetch and transcode, back to back).
+
+    Callers are expected to skip tracks that are already downloaded (see
+    get_pending_tracks). Returns (success, method) where method is "direct"
+    or "search".
+    """
+    path, method = fetch_song(track, index, total)
+    return (path is not None and transcode_song(track, path)), method
+
+def get_downloaded_ids() -> Set[str]:
+    """Snapshot the spotify_ids already in SONGS_DIR with a single directory scan"""
+    with os.scandir(SONGS_DIR) as entries:
+        return {e.name[:-4] for e in entries if e.name.endswith(".mp3")}
+
+class DownloadArchive:
+    """Persistent record of downloaded and failed spotify_ids.
+
+    Mirrors yt-dlp's --download-archive: completion is looked up in a set
+    instead of being re-derived from the filesystem, and failures are
+    remembered so repeat runs can tell them apart from never-tried tracks.
+    Safe to update from several threads.
+    """
+
+    def __init__(self, path: str = ARCHIVE_FILE, save_every: int = 25):
+        self.path = path
+        self.save_every = save_every
+        self.downloaded: Set[str] = set()
+        self.failed: Set[str] = set()
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.downloaded = set(data.get("downloaded", []))
+                self.failed = set(data.get("failed", []))
+                return
+            except Exception as e:
+                logging.warning(f"⚠️ Could not load download archive, rebuilding it: {e}")
+
+        # No usable archive yet: adopt the mp3s already on disk
+        self.downloaded = get_downloaded_ids()
+
+    def __contains__(self, spotify_id: str) -> bool:
+        return spotify_id in self.downloaded
+
+    def record(self, spotify_id: str, success: bool):
+        with self._lock:
+            if success:
+                self.downloaded.add(spotify_id)
+                self.failed.discard(spotify_id)
+            else:
+                self.failed.add(spotify_id)
+            self._unsaved += 1
+            if self._unsaved >= self.save_every:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"downloaded": sorted(self.downloaded), "failed": sorted(self.failed)}, f)
+        os.replace(tmp_path, self.path)
+        self._unsaved = 0
+
+def get_pending_tracks(tracks: Iterable[Dict], downloaded_ids: Set[str]) -> List[Dict]:
+    """Tracks that still need downloading (accepts a list or iter_metadata()).
+
+    A playlist can list the same track twice; only its first occurrence is
+    kept, since both copies would download to the same files.
+    """
+    pending = []
+    seen = set()
+    for track in tracks:
+        spotify_id = track.get("spotify_id")
+        if spotify_id in downloaded_ids or spotify_id in seen:
+            continue
+        seen.add(spotify_id)
+        pending.append(track)
+    return pending
+
+def download_tracks(pending: List[Dict], max_workers: int = MAX_DOWNLOAD_WORKERS,
+                    ffmpeg_workers: int = FFMPEG_WORKERS,
+                    archive: Optional[DownloadArchive] = None) -> Dict:
+    """Download the given tracks in parallel.
+
+    Network fetches and mp3 transcodes run on separate pools, so one track
+    is encoded while the next is still downloading. Longest tracks are
+    submitted first so a long video picked up late doesn't hold up the end
+    of the run. Each outcome is recorded in `archive` when one is given.
+    Returns success/failure counts, plus how many succeeded via a direct
+    YouTube URL versus the search fallback.
+    """
+    results = {"success": 0, "failed": 0, "direct": 0, "search": 0}
+    done = 0
 
-def get_download_stats(tracks: List[Dict]) -> Dict:
-    """Get statistics about downloads"""
-    total = len(tracks)
+    def finish(track: Dict, success: bool, method: Optional[str] = None):
+        nonlocal done
+        done += 1
+        results["success" if success else "failed"] += 1
+        if success and method in results:
+            results[method] += 1
+        if archive is not None:
+            archive.record(track.get("spotify_id"), success)
+        print(f"[{done}/{len(pending)}] {'✅' if success else '❌'} {track.get('song_title', 'Unknown')}")
+
+    ordered = sorted(pending, key=lambda t: t.get("duration") or 0, reverse=True)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as net_pool, \
+            ThreadPoolExecutor(max_workers=ffmpeg_workers) as ff_pool:
+        fetching = {
+            net_pool.submit(fetch_song, track, i, len(ordered)): track
+            for i, track in enumerate(ordered, 1)
+        }
+        transcoding = {}
+        try:
+            while fetching or transcoding:
+                finished, _ = wait([*fetching, *transcoding], return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in fetching:
+                        track = fetching.pop(future)
+                        try:
+                            path, method = future.result()
+                        except Exception as e:
+                            logging.error(f"❌ Unexpected error downloading '{track.get('song_title', 'Unknown')}': {e}")
+                            path, method = None, None
+                        if path is None:
+                            finish(track, False)
+                        else:
+                            transcoding[ff_pool.submit(transcode_song, track, path)] = (track, method)
+                    else:
+                        track, method = transcoding.pop(future)
+                        try:
+                            success = future.result()
+                        except Exception as e:
+                            logging.error(f"❌ Unexpected error converting '{track.get('song_title', 'Unknown')}': {e}")
+                            success = False
+                        finish(track, success, method)
+        except KeyboardInterrupt:
+            print(f"\n⏹️  Download stopped by user, finishing in-progress downloads...")
+            for future in [*fetching, *transcoding]:
+                future.cancel()
+
+    if archive is not None:
+        archive.save()
+    return results
+
+def get_download_stats(tracks: Iterable[Dict], downloaded_ids: Optional[Set[str]] = None,
+                       failed_ids: Optional[Set[str]] = None) -> Dict:
+    """Get statistics about downloads in a single pass over `tracks`.
+
+    Tracks are counted once per spotify_id, matching get_pending_tracks.
+    """
+    if downloaded_ids is None:
+        downloaded_ids = get_downloaded_ids()
+    failed_ids = failed_ids or set()
+
+    total = 0
     downloaded = 0
+    failed_before = 0
     has_youtube_url = 0
+    seen = set()
     
     for track in tracks:
         spotify_id = track.get("spotify_id")
-        output_path = SONGS_DIR / f"{spotify_id}.mp3"
-        
-        if output_path.exists():
+        if spotify_id in seen:
+            continue
+        seen.add(spotify_id)
+        total += 1
+        if spotify_id in downloaded_ids:
             downloaded += 1
+        elif spotify_id in failed_ids:
+            failed_before += 1
         
         if track.get("youtube_url"):
             has_youtube_url += 1
@@ -159,63 +477,57 @@ def get_download_stats(tracks: List[Dict]) -> Dict:
         "total": total,
         "downloaded": downloaded,
         "remaining": total - downloaded,
+        "failed_before": failed_before,
         "has_youtube_url": has_youtube_url,
         "success_rate": (downloaded / total * 100) if total > 0 else 0
     }
 
+def print_download_stats(stats: Dict, title: str = "Current Status"):
+    print(f"\n📊 {title}:")
+    print(f"   📝 Total tracks: {stats['total']}")
+    print(f"   ✅ Already downloaded: {stats['downloaded']}")
+    print(f"   ⏳ Remaining: {stats['remaining']}")
+    if stats.get('failed_before'):
+        print(f"   ⚠️  Failed on a previous run: {stats['failed_before']}")
+    print(f"   🎯 Have YouTube URLs: {stats['has_youtube_url']}")
+    print(f"   📈 Current success rate: {stats['success_rate']:.1f}%")
+
 def main():
     print("=" * 60)
     print("📥 Enhanced YouTube MP3 Downloader")
     print("📱 Direct URLs + Search Fallback")
     print("=" * 60)
 
-    tracks = load_metadata()
-    if not tracks:
+    # Stream the metadata file instead of holding every track in memory:
+    # one pass for the stats, a second that keeps only the pending tracks
+    archive = DownloadArchive()
+    stats = get_download_stats(iter_metadata(), archive.downloaded, archive.failed)
+    if stats['total'] == 0:
         print("❌ No tracks found in metadata.")
         return
 
-    # Show statistics
-    stats = get_download_stats(tracks)
-    print(f"\n📊 Download Statistics:")
-    print(f"   📝 Total tracks: {stats['total']}")
-    print(f"   ✅ Already downloaded: {stats['downloaded']}")
-    print(f"   ⏳ Remaining: {stats['remaining']}")
-    print(f"   🎯 Have YouTube URLs: {stats['has_youtube_url']}")
-    print(f"   📈 Success rate: {stats['success_rate']:.1f}%")
+    print_download_stats(stats, "Download Statistics")
 
     if stats['remaining'] == 0:
         print("\n🎉 All tracks already downloaded!")
         return
 
+    if stats['downloaded']:
+        logging.info(f"⏭️  Already exists: skipping {stats['downloaded']} downloaded tracks")
     print(f"\n🚀 Starting download of {stats['remaining']} tracks...\n")
 
     # Download remaining tracks
-    success_count = 0
-    fail_count = 0
-
-    for i, track in enumerate(tracks, 1):
-        spotify_id = track.get("spotify_id")
-        output_path = SONGS_DIR / f"{spotify_id}.mp3"
-        
-        # Skip if already exists
-        if output_path.exists():
-            continue
-            
-        logging.info(f"[{i}/{len(tracks)}] Starting download...")
-        
-        if download_song(track):
-            success_count += 1
-        else:
-            fail_count += 1
+    results = download_tracks(get_pending_tracks(iter_metadata(), archive.downloaded), archive=archive)
 
     # Final statistics
     print(f"\n" + "=" * 60)
     print(f"📊 DOWNLOAD COMPLETE")
     print(f"=" * 60)
-    print(f"✅ Successful: {success_count}")
-    print(f"❌ Failed: {fail_count}")
+    print(f"✅ Successful: {results['success']}")
+    print(f"❌ Failed: {results['failed']}")
     print(f"📁 Check 'songs/' folder for downloaded files")
     print(f"📋 Check 'download_log.txt' for detailed logs")
 
 if __name__ == "__main__":
+    configure_logging()
     main()
\ No newline at end of file